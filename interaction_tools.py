@@ -11,10 +11,16 @@ Logging is kept to ERROR level only - we only log unexpected exceptions.
 from __future__ import annotations
 
 # Standard library
+import ctypes
 import logging
+import math
+import os
 import time
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from typing import Any
 
 try:
+    import objc
     from AppKit import (
         NSApplicationActivateIgnoringOtherApps,
         NSRunningApplication,
@@ -47,6 +53,7 @@ try:
         kCGMouseButtonLeft,
         kCGMouseButtonRight,
         kCGNullWindowID,
+        kCGWindowListExcludeDesktopElements,
         kCGWindowListOptionAll,
         kCGWindowListOptionOnScreenOnly,
     )
@@ -54,7 +61,7 @@ except ImportError as e:
     raise ImportError(f"Failed to import required macOS frameworks: {e}") from e
 
 # Mapping utilities
-from keycodes import KEYCODES, MODIFIER_FLAGS
+from keycodes import KEYCODES, MODIFIER_FLAGS, TYPING_KEYCODES
 
 # Local imports - avoid circular deps by importing *after* mcp is created.
 from mcp_shared import logger, mcp
@@ -66,20 +73,203 @@ logger.setLevel(logging.ERROR)
 # Maximum number of characters processed by type_text per call
 MAX_TYPE_TEXT_CHARS = 200
 
+# Combined-session event source shared by every synthesized event, so events
+# appear to originate from a real keyboard / mouse without creating a new
+# source per call.
+_EVENT_SOURCE = CGEventSourceCreate(kCGEventSourceStateCombinedSessionState)
+
+# Index of window_id -> window info dict, rebuilt wholesale on a miss or once it
+# is older than _CACHE_TTL seconds.
+_WINDOW_CACHE: dict[int, Mapping[str, Any]] = {}
+_window_cache_at = 0.0
+_CACHE_TTL = 0.1
+
+# Window lists returned by the listing tools, cached per options bitmask for a
+# short time so that bursts of listing / search calls share a single WindowServer
+# round trip. Cleared together with the index above by _invalidate_window_cache.
+_DEFAULT_WINDOW_LIST_TTL_MS = 250
+_WINDOW_LIST_CACHE: dict[int, tuple[float, Sequence[Mapping[str, Any]]]] = {}
+
+# Owner pid of the frontmost normal window, recorded with each on-screen rebuild
+# of the index. NSRunningApplication.isActive() is only refreshed by a main run
+# loop, which this server never runs, so WindowServer data is used instead.
+_front_pid: int | None = None
+
+# Valid *button* arguments, checked by the tools before any Quartz work
+_BUTTONS = frozenset({"left", "right", "middle"})
+
+# Mouse button -> (down event, up event, button index)
+_CLICK_MAP: dict[str, tuple[CGEventType, CGEventType, int]] = {
+    "left": (kCGEventLeftMouseDown, kCGEventLeftMouseUp, kCGMouseButtonLeft),
+    "right": (kCGEventRightMouseDown, kCGEventRightMouseUp, kCGMouseButtonRight),
+    "middle": (kCGEventOtherMouseDown, kCGEventOtherMouseUp, kCGMouseButtonCenter),
+}
+
+# Mouse button -> (down event, dragged event, up event, button index)
+_DRAG_MAP: dict[str, tuple[CGEventType, CGEventType, CGEventType, int]] = {
+    "left": (
+        kCGEventLeftMouseDown,
+        kCGEventLeftMouseDragged,
+        kCGEventLeftMouseUp,
+        kCGMouseButtonLeft,
+    ),
+    "right": (
+        kCGEventRightMouseDown,
+        kCGEventRightMouseDragged,
+        kCGEventRightMouseUp,
+        kCGMouseButtonRight,
+    ),
+    "middle": (
+        kCGEventOtherMouseDown,
+        kCGEventOtherMouseDragged,
+        kCGEventOtherMouseUp,
+        kCGMouseButtonCenter,
+    ),
+}
+
 # ---------------------------------------------------------------------------
 # Helper functions
 # ---------------------------------------------------------------------------
 
 
+def _load_cg_functions() -> tuple[Callable[..., Any], ...] | None:
+    """
+    Bind the event hot-path functions via ctypes.
+
+    Returns (CGEventPost, CGEventCreateKeyboardEvent,
+    CGEventKeyboardSetUnicodeString, CFRelease), or None if the frameworks
+    can't be loaded.
+    """
+    try:
+        app_services = ctypes.CDLL(
+            "/System/Library/Frameworks/ApplicationServices.framework/ApplicationServices"
+        )
+        core_foundation = ctypes.CDLL(
+            "/System/Library/Frameworks/CoreFoundation.framework/CoreFoundation"
+        )
+    except OSError:
+        return None
+
+    post = app_services.CGEventPost
+    post.argtypes = [ctypes.c_uint32, ctypes.c_void_p]
+    post.restype = None
+
+    create_keyboard_event = app_services.CGEventCreateKeyboardEvent
+    create_keyboard_event.argtypes = [ctypes.c_void_p, ctypes.c_uint16, ctypes.c_bool]
+    create_keyboard_event.restype = ctypes.c_void_p
+
+    set_unicode_string = app_services.CGEventKeyboardSetUnicodeString
+    set_unicode_string.argtypes = [ctypes.c_void_p, ctypes.c_ulong, ctypes.c_char_p]
+    set_unicode_string.restype = None
+
+    release = core_foundation.CFRelease
+    release.argtypes = [ctypes.c_void_p]
+    release.restype = None
+
+    return post, create_keyboard_event, set_unicode_string, release
+
+
+# Posting and Unicode typing are the innermost calls of type_text / drag, so they
+# skip the PyObjC dispatcher and call CoreGraphics directly when possible.
+_CG_FUNCTIONS = _load_cg_functions()
+if _CG_FUNCTIONS is not None:
+    _CG_EVENT_POST, _CG_CREATE_KEYBOARD_EVENT, _CG_SET_UNICODE_STRING, _CF_RELEASE = _CG_FUNCTIONS
+else:
+    _CG_EVENT_POST = _CG_CREATE_KEYBOARD_EVENT = _CG_SET_UNICODE_STRING = _CF_RELEASE = None
+
+
+def _post_event(event: object) -> None:
+    """Post a CG *event* to the HID event tap."""
+    if _CG_EVENT_POST is not None:
+        _CG_EVENT_POST(kCGHIDEventTap, objc.pyobjc_id(event))
+    else:
+        CGEventPost(kCGHIDEventTap, event)
+
+
+def _index_window_list(
+    window_list: Iterable[Mapping[str, Any]],
+) -> dict[int, Mapping[str, Any]]:
+    """Return a {window_id: window_info} index over a Quartz window list."""
+    return {win["kCGWindowNumber"]: win for win in window_list if "kCGWindowNumber" in win}
+
+
+def _refresh_window_cache(options: int) -> None:
+    """Rebuild the window index from a single window-list enumeration."""
+    global _window_cache_at, _front_pid
+    window_list = CGWindowListCopyWindowInfo(options, kCGNullWindowID) or ()
+    _WINDOW_CACHE.clear()
+    _WINDOW_CACHE.update(_index_window_list(window_list))
+    _window_cache_at = time.monotonic()
+    if options & kCGWindowListOptionOnScreenOnly:
+        # The on-screen list is ordered front to back, and layer 0 holds
+        # ordinary application windows
+        _front_pid = next(
+            (win.get("kCGWindowOwnerPID") for win in window_list if win.get("kCGWindowLayer") == 0),
+            None,
+        )
+
+
+def _invalidate_window_cache() -> None:
+    """Drop cached window info and window lists, forcing the next lookup to hit Quartz."""
+    global _window_cache_at, _front_pid
+    _WINDOW_CACHE.clear()
+    _window_cache_at = 0.0
+    _front_pid = None
+    _WINDOW_LIST_CACHE.clear()
+
+
+def _window_list_ttl() -> float:
+    """
+    Read the window list cache TTL from WINSYS_WINDOWLIST_TTL_MS.
+
+    Returns:
+        The TTL in seconds. Malformed values fall back to the default and
+        negative values are treated as 0 (cache disabled).
+
+    """
+    value = os.environ.get("WINSYS_WINDOWLIST_TTL_MS", str(_DEFAULT_WINDOW_LIST_TTL_MS))
+    try:
+        ttl_ms = int(value)
+    except ValueError:
+        logger.error(
+            "Invalid WINSYS_WINDOWLIST_TTL_MS %r, using %s ms", value, _DEFAULT_WINDOW_LIST_TTL_MS
+        )
+        return _DEFAULT_WINDOW_LIST_TTL_MS / 1000
+    return max(0, ttl_ms) / 1000
+
+
+_WINDOW_LIST_TTL = _window_list_ttl()
+
+
+def get_window_list(options: int) -> Sequence[Mapping[str, Any]]:
+    """Return the Quartz window list for *options*, reusing a recent result if fresh."""
+    now = time.monotonic()
+    cached = _WINDOW_LIST_CACHE.get(options)
+    if cached is not None and now - cached[0] < _WINDOW_LIST_TTL:
+        return cached[1]
+    window_list = CGWindowListCopyWindowInfo(options, kCGNullWindowID)
+    _WINDOW_LIST_CACHE[options] = (now, window_list)
+    return window_list
+
+
+def _lookup_window(window_id: int) -> Mapping[str, Any] | None:
+    """Return the cached window info dict for *window_id* or None if not found."""
+    win = _WINDOW_CACHE.get(window_id)
+    if win is None or time.monotonic() - _window_cache_at >= _CACHE_TTL:
+        # Interaction targets are almost always visible, so try the much shorter
+        # on-screen list first and only fall back to every window on a miss.
+        _refresh_window_cache(kCGWindowListOptionOnScreenOnly | kCGWindowListExcludeDesktopElements)
+        win = _WINDOW_CACHE.get(window_id)
+        if win is None:
+            _refresh_window_cache(kCGWindowListOptionAll)
+            win = _WINDOW_CACHE.get(window_id)
+    return win
+
+
 def _fetch_bounds(window_id: int) -> dict[str, int] | None:
     """Return bounds dict {{X,Y,Width,Height}} for *window_id* or None if not found."""
-    window_list = CGWindowListCopyWindowInfo(
-        kCGWindowListOptionAll | kCGWindowListOptionOnScreenOnly, kCGNullWindowID
-    )
-    for win in window_list:
-        if win.get("kCGWindowNumber") == window_id:
-            return win.get("kCGWindowBounds")  # type: ignore[return-value]
-    return None
+    win = _lookup_window(window_id)
+    return win.get("kCGWindowBounds") if win is not None else None
 
 
 def _to_abs(x: int, y: int, window_id: int | None = None) -> tuple[int, int]:
@@ -94,8 +284,8 @@ def _to_abs(x: int, y: int, window_id: int | None = None) -> tuple[int, int]:
 
 def _mouse_event(event_type: CGEventType, abs_x: int, abs_y: int, button_idx: int) -> None:
     """Create and post a CG mouse event."""
-    event = CGEventCreateMouseEvent(None, event_type, (abs_x, abs_y), button_idx)
-    CGEventPost(kCGHIDEventTap, event)
+    event = CGEventCreateMouseEvent(_EVENT_SOURCE, event_type, (abs_x, abs_y), button_idx)
+    _post_event(event)
 
 
 def _post_mouse_move(abs_x: int, abs_y: int) -> None:
@@ -103,14 +293,7 @@ def _post_mouse_move(abs_x: int, abs_y: int) -> None:
 
 
 def _post_mouse_click(abs_x: int, abs_y: int, button: str) -> None:
-    mapping: dict[str, tuple[CGEventType, CGEventType, CGEventType]] = {
-        "left": (kCGEventLeftMouseDown, kCGEventLeftMouseUp, kCGMouseButtonLeft),
-        "right": (kCGEventRightMouseDown, kCGEventRightMouseUp, kCGMouseButtonRight),
-        "middle": (kCGEventOtherMouseDown, kCGEventOtherMouseUp, kCGMouseButtonCenter),
-    }
-    if button not in mapping:
-        raise ValueError("Invalid button. Must be 'left', 'right', or 'middle'.")
-    down_type, up_type, btn_idx = mapping[button]
+    down_type, up_type, btn_idx = _CLICK_MAP[button]
     _mouse_event(down_type, abs_x, abs_y, btn_idx)
     _mouse_event(up_type, abs_x, abs_y, btn_idx)
 
@@ -119,81 +302,104 @@ def _post_mouse_drag(
     from_abs: tuple[int, int],
     to_abs: tuple[int, int],
     button: str,
+    steps: int | None = None,
 ) -> None:
-    mapping: dict[str, tuple[CGEventType, CGEventType, CGEventType]] = {
-        "left": (kCGEventLeftMouseDown, kCGEventLeftMouseDragged, kCGEventLeftMouseUp),
-        "right": (kCGEventRightMouseDown, kCGEventRightMouseDragged, kCGEventRightMouseUp),
-        "middle": (kCGEventOtherMouseDown, kCGEventOtherMouseDragged, kCGEventOtherMouseUp),
-    }
-    if button not in mapping:
-        raise ValueError("Invalid button. Must be 'left', 'right', or 'middle'.")
-    down_type, drag_type, up_type = mapping[button]
-    btn_idx = {
-        "left": kCGMouseButtonLeft,
-        "right": kCGMouseButtonRight,
-        "middle": kCGMouseButtonCenter,
-    }[button]
+    down_type, drag_type, up_type, btn_idx = _DRAG_MAP[button]
 
     # Press
     _mouse_event(down_type, *from_abs, btn_idx)
-    # Drag - we interpolate a few points for smoother behaviour
-    steps = 10
-    dx = (to_abs[0] - from_abs[0]) / steps
-    dy = (to_abs[1] - from_abs[1]) / steps
-    for i in range(1, steps + 1):
-        _mouse_event(drag_type, int(from_abs[0] + dx * i), int(from_abs[1] + dy * i), btn_idx)
+    # Drag - we interpolate a few points for smoother behaviour, roughly one every
+    # 8 px by default. Points that round to the previous pixel are skipped since
+    # macOS would merge them anyway.
+    fx, fy = from_abs
+    dx = to_abs[0] - fx
+    dy = to_abs[1] - fy
+    if dx or dy:
+        if steps is None:
+            steps = max(2, int(math.hypot(dx, dy) / 8))
+        # More steps than pixels along the longer axis only produce repeats, so
+        # a caller-supplied count cannot make the loop below arbitrarily long.
+        steps = min(steps, max(abs(dx), abs(dy)))
+        # All points are computed up front in integer arithmetic; the path is
+        # monotonic, so dict.fromkeys drops exactly the consecutive repeats.
+        points = dict.fromkeys(
+            (fx + dx * i // steps, fy + dy * i // steps) for i in range(1, steps + 1)
+        )
+        points.pop(from_abs, None)
+        for x, y in points:
+            _mouse_event(drag_type, x, y, btn_idx)
     # Release
     _mouse_event(up_type, *to_abs, btn_idx)
 
 
 def _activate_app_for_window(window_id: int) -> None:
     """Bring the owning application of *window_id* to the front, ignoring other apps."""
-    window_list = CGWindowListCopyWindowInfo(kCGWindowListOptionAll, kCGNullWindowID)
-    pid: int | None = None
-    for win in window_list:
-        if win.get("kCGWindowNumber") == window_id:
-            pid = win.get("kCGWindowOwnerPID")
-            break
+    win = _lookup_window(window_id)
+    pid = win.get("kCGWindowOwnerPID") if win is not None else None
     if pid is None:
         raise ValueError("window_id not found when activating app")
+    # Skip the activation round-trip (and the focus-change events it triggers)
+    # when the app is already frontmost. The lookup above has just refreshed
+    # _front_pid unless the index was still fresh.
+    if pid == _front_pid:
+        return
     app = NSRunningApplication.runningApplicationWithProcessIdentifier_(pid)
     if app is not None:
         app.activateWithOptions_(NSApplicationActivateIgnoringOtherApps)
+        # Stacking order has changed, also for the callers other than activate_window
+        _invalidate_window_cache()
 
 
 def _post_keyboard_unicode(char: str, source: any) -> None:
     """Send a single unicode character via CG events using *source*."""
     if len(char) != 1:
         raise ValueError("_post_keyboard_unicode expects a single character")
-    event_down = CGEventCreateKeyboardEvent(source, 0, True)
-    CGEventKeyboardSetUnicodeString(event_down, 1, char)
-    CGEventPost(kCGHIDEventTap, event_down)
-
-    event_up = CGEventCreateKeyboardEvent(source, 0, False)
-    CGEventKeyboardSetUnicodeString(event_up, 1, char)
-    CGEventPost(kCGHIDEventTap, event_up)
+    if _CG_CREATE_KEYBOARD_EVENT is None:
+        event_down = CGEventCreateKeyboardEvent(source, 0, True)
+        CGEventKeyboardSetUnicodeString(event_down, 1, char)
+        _post_event(event_down)
+
+        event_up = CGEventCreateKeyboardEvent(source, 0, False)
+        CGEventKeyboardSetUnicodeString(event_up, 1, char)
+        _post_event(event_up)
+        return
+
+    # Fast path: create, fill and post both events without leaving ctypes.
+    # UniChar strings are UTF-16, so characters outside the BMP take two units.
+    # A NULL source is valid; _EVENT_SOURCE is None if CGEventSourceCreate failed
+    source_ref = objc.pyobjc_id(source) if source is not None else None
+    units = char.encode("utf-16-le")
+    for key_down in (True, False):
+        event = _CG_CREATE_KEYBOARD_EVENT(source_ref, 0, key_down)
+        if not event:
+            raise RuntimeError("CGEventCreateKeyboardEvent failed")
+        try:
+            _CG_SET_UNICODE_STRING(event, len(units) // 2, units)
+            _CG_EVENT_POST(kCGHIDEventTap, event)
+        finally:
+            _CF_RELEASE(event)
 
 
 def _post_keycode_type(keycode: int, flags: int, source: any) -> None:
     """Type a single key by *keycode* using *source* with optional *flags*."""
     event_down = CGEventCreateKeyboardEvent(source, keycode, True)
     CGEventSetFlags(event_down, flags)
-    CGEventPost(kCGHIDEventTap, event_down)
+    _post_event(event_down)
 
     event_up = CGEventCreateKeyboardEvent(source, keycode, False)
     CGEventSetFlags(event_up, flags)
-    CGEventPost(kCGHIDEventTap, event_up)
+    _post_event(event_up)
 
 
 def _post_keycode_press(keycode: int, flags: int) -> None:
     """Press and release a *keycode* with *flags* (modifier mask)."""
-    event_down = CGEventCreateKeyboardEvent(None, keycode, True)
+    event_down = CGEventCreateKeyboardEvent(_EVENT_SOURCE, keycode, True)
     CGEventSetFlags(event_down, flags)
-    CGEventPost(kCGHIDEventTap, event_down)
+    _post_event(event_down)
 
-    event_up = CGEventCreateKeyboardEvent(None, keycode, False)
+    event_up = CGEventCreateKeyboardEvent(_EVENT_SOURCE, keycode, False)
     CGEventSetFlags(event_up, flags)
-    CGEventPost(kCGHIDEventTap, event_up)
+    _post_event(event_up)
 
 
 # ---------------------------------------------------------------------------
@@ -231,6 +437,8 @@ def click_at(
     *button* may be "left", "right", or "middle".
     Coordinates are relative to *window_id* if provided, else absolute.
     """
+    if button not in _BUTTONS:
+        return "Error: Invalid button. Must be 'left', 'right', or 'middle'."
     try:
         window_id_int = int(window_id) if window_id is not None else None
         abs_x, abs_y = _to_abs(x, y, window_id_int)
@@ -249,16 +457,26 @@ def drag(
     to_y: int,
     button: str = "left",
     window_id: int | None = None,
+    steps: int | None = None,
 ) -> str:
     """
     Drag the mouse from (from_x, from_y) to (to_x, to_y).
 
     Coordinates are interpreted relative to *window_id* if supplied.
+    *steps* sets how many intermediate drag events are posted; by default one
+    is posted roughly every 8 pixels of travel. It is capped at one per pixel
+    along the longer axis.
     """
+    if button not in _BUTTONS:
+        return "Error: Invalid button. Must be 'left', 'right', or 'middle'."
     try:
+        if steps is not None and steps < 1:
+            return "Error: steps must be at least 1"
         from_abs = _to_abs(from_x, from_y, window_id)
         to_abs = _to_abs(to_x, to_y, window_id)
-        _post_mouse_drag(from_abs, to_abs, button)
+        _post_mouse_drag(from_abs, to_abs, button, steps)
+        # A drag may have moved or resized a window, so cached bounds are suspect
+        _invalidate_window_cache()
         return "OK"
     except Exception as exc:  # pylint: disable=broad-exception-caught
         logger.error("drag failed: %s", exc)
@@ -266,12 +484,14 @@ def drag(
 
 
 @mcp.tool()
-def type_text(text: str, window_id: int | None = None) -> str:
+def type_text(text: str, window_id: int | None = None, delay_ms: int = 0) -> str:
     """
-    Type *text* with realistic keystrokes and human-like delay.
+    Type *text* with realistic keystrokes.
 
-    A combined-session `CGEventSource` is used to make the events appear as if
-    they originate from a real keyboard.
+    The shared combined-session `CGEventSource` is used to make the events
+    appear as if they originate from a real keyboard. Keystrokes are posted
+    back-to-back unless *delay_ms* is given, in which case the call sleeps that
+    many milliseconds after each character.
 
     Processes at most 200 characters per call. If the input exceeds this limit,
     an error is returned and no text is typed.
@@ -279,25 +499,25 @@ def type_text(text: str, window_id: int | None = None) -> str:
     try:
         if len(text) > MAX_TYPE_TEXT_CHARS:
             return f"Error: type_text input exceeds {MAX_TYPE_TEXT_CHARS} characters"
-        # Create a unified event source once per call
-        source = CGEventSourceCreate(kCGEventSourceStateCombinedSessionState)
-
+        if delay_ms < 0:
+            return "Error: delay_ms must not be negative"
         # Bring target application to front if we know its window id
         if window_id is not None:
             _activate_app_for_window(window_id)
 
         limited_text = text[:MAX_TYPE_TEXT_CHARS]
+        delay = delay_ms / 1000
 
         for ch in limited_text:
             # Try realistic keycode first
-            keycode = KEYCODES.get(ch.lower())
-            if keycode is not None:
-                _post_keycode_type(keycode, 0, source)
+            key = TYPING_KEYCODES.get(ch)
+            if key is not None:
+                _post_keycode_type(*key, _EVENT_SOURCE)
             else:
-                _post_keyboard_unicode(ch, source)
+                _post_keyboard_unicode(ch, _EVENT_SOURCE)
 
-            # Small delay for human-like typing speed
-            time.sleep(0.05)
+            if delay:
+                time.sleep(delay)
 
         return "OK"
     except Exception as exc:  # pylint: disable=broad-exception-caught
@@ -345,7 +565,7 @@ def get_window_bounds(window_id: int) -> dict[str, int] | str:
 def mouse_position() -> tuple[int, int] | str:
     """Return current mouse cursor position as (x, y)."""
     try:
-        event = CoreGraphics.CGEventCreate(None)
+        event = CoreGraphics.CGEventCreate(_EVENT_SOURCE)
         point = CoreGraphics.CGEventGetLocation(event)
         return int(point.x), int(point.y)
     except Exception as exc:  # pylint: disable=broad-exception-caught
@@ -373,6 +593,8 @@ def activate_window(window_id: int) -> str:
     """
     try:
         _activate_app_for_window(window_id)
+        # Activation can unhide or reorder windows
+        _invalidate_window_cache()
         return "OK"
     except Exception as exc:  # pylint: disable=broad-exception-caught
         logger.error("activate_window failed: %s", exc)
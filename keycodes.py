@@ -83,3 +83,17 @@ MODIFIER_FLAGS: dict[str, int] = {
     "option": kCGEventFlagMaskAlternate,
     "shift": kCGEventFlagMaskShift,
 }
+
+# Single characters typed by type_text -> (keycode, modifier flags). Built once so
+# the typing loop is a single dict probe per character with no str.lower() call.
+# Upper-case letters reuse the letter key with Shift held.
+TYPING_KEYCODES: dict[str, tuple[int, int]] = {
+    char: (keycode, 0) for char, keycode in KEYCODES.items() if len(char) == 1
+}
+TYPING_KEYCODES.update(
+    {
+        char.upper(): (keycode, kCGEventFlagMaskShift)
+        for char, keycode in KEYCODES.items()
+        if len(char) == 1 and char.isalpha()
+    }
+)
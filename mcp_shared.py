@@ -8,10 +8,15 @@ throughout the process.
 
 from __future__ import annotations
 
+import asyncio
 import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 
 from mcp.server.fastmcp import FastMCP
 
+from signal_handler import graceful_shutdown
+
 # ---------------------------------------------------------------------------
 # Logging configuration (errors only, stderr handler)
 # ---------------------------------------------------------------------------
@@ -28,10 +33,19 @@ logger = logging.getLogger("winsys-mcp-server")
 # Shared FastMCP instance
 # ---------------------------------------------------------------------------
 
+
+@asynccontextmanager
+async def _bind_signal_loop(_server: FastMCP) -> AsyncIterator[None]:
+    """Run signal-triggered shutdown work on the loop serving MCP requests."""
+    graceful_shutdown.bind_loop(asyncio.get_running_loop())
+    yield
+
+
 mcp = FastMCP(
     "WindowManager",
     description="MCP server for interacting with OS window systems",
-    dependencies=["pyobjc-framework-Quartz", "Pillow", "pyobjc-framework-Cocoa"],
+    dependencies=["pyobjc-framework-Quartz", "pyobjc-framework-Cocoa"],
+    lifespan=_bind_signal_loop,
 )
 
 __all__ = ["logger", "mcp"]
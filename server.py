@@ -6,9 +6,15 @@ the macOS window system, including listing windows, taking screenshots,
 and finding windows by title.
 """
 
+import asyncio
+import functools
 import json
+import operator
+import re
 import sys
-from typing import TypeVar, cast
+from collections.abc import Callable, Iterable, Mapping
+from types import SimpleNamespace
+from typing import Any, TypeVar, cast
 
 from mcp.server.fastmcp import Image as McpImage
 
@@ -20,11 +26,12 @@ if sys.platform != "darwin":
     sys.exit(1)
 
 # Import interaction tools so that their MCP tools are registered. This import
-# must occur *after* mcp is created to avoid circular import issues.
-import interaction_tools  # noqa: F401
+# must occur *after* mcp is created to avoid circular import issues. The window
+# list cache lives there so that window-changing tools can invalidate it.
+from interaction_tools import get_window_list
 
 # Import shutdown handling utilities
-from server_shutdown import ShutdownReason, shutdown_manager
+from server_shutdown import ShutdownReason, ShutdownStatus, shutdown_manager
 from signal_handler import graceful_shutdown
 from transport_handlers import stdio_handler
 
@@ -33,16 +40,12 @@ ReturnT = TypeVar("ReturnT")
 
 try:
     # Import macOS specific libraries - only import what's actually used
+    # (screenshot-only symbols are resolved lazily by _screenshot_api)
+    import objc
     from Quartz import (
-        CGRectNull,
-        CGWindowListCopyWindowInfo,
-        CGWindowListCreateImage,
-        NSBitmapImageRep,
         kCGNullWindowID,
-        kCGWindowImageBoundsIgnoreFraming,
         kCGWindowListExcludeDesktopElements,
         kCGWindowListOptionAll,
-        kCGWindowListOptionIncludingWindow,
         kCGWindowListOptionOnScreenOnly,
     )
 except ImportError as e:
@@ -50,6 +53,85 @@ except ImportError as e:
 
 # NOTE: logger and mcp are now provided by mcp_shared
 
+# Shared fallback for windows that report no bounds
+_EMPTY_BOUNDS: dict[str, float] = {}
+
+# Required window info / bounds keys, extracted in one call each
+_get_window_ids = operator.itemgetter("kCGWindowOwnerPID", "kCGWindowNumber")
+_get_bounds = operator.itemgetter("X", "Y", "Width", "Height")
+
+# The two window list option sets used by the listing tools
+_OPTS_ALL = kCGWindowListOptionAll
+_OPTS_ONSCREEN = (
+    kCGWindowListOptionAll | kCGWindowListOptionOnScreenOnly | kCGWindowListExcludeDesktopElements
+)
+
+# Screenshots are sent straight back to the client, so encoding latency matters
+# more than file size. Skipping PNG row filtering (IMAGEIO_PNG_FILTER_NONE from
+# <ImageIO/CGImageProperties.h>) avoids ImageIO's slow per-row filter search.
+_PNG_FILTER_NONE = 0x08
+
+# Compact JSON for tool results - no whitespace to build, send or tokenize
+_JSON_SEPARATORS = (",", ":")
+
+
+def _window_record(window: Mapping[str, Any], bounds: Mapping[str, float]) -> dict[str, object]:
+    """Build the JSON window object for a Quartz window info dict and its *bounds*."""
+    try:
+        # Quartz documents these keys as always present, so one C-level
+        # itemgetter call per dict covers the common case.
+        pid, win_id = _get_window_ids(window)
+        x, y, width, height = _get_bounds(bounds)
+    except KeyError:
+        pid = window.get("kCGWindowOwnerPID", 0)
+        win_id = window.get("kCGWindowNumber", 0)
+        bg = bounds.get
+        x, y, width, height = bg("X", 0), bg("Y", 0), bg("Width", 0), bg("Height", 0)
+    return {
+        "pid": int(pid),
+        "window_id": int(win_id),
+        "title": str(window.get("kCGWindowOwnerName", "")),
+        "subtitle": str(window.get("kCGWindowName", "")),
+        "bounds": {"x": int(x), "y": int(y), "width": int(width), "height": int(height)},
+    }
+
+
+def _format_windows(
+    window_list: Iterable[Mapping[str, Any]],
+    predicate: Callable[[Mapping[str, Any]], object],
+) -> str:
+    """
+    Serialize the windows accepted by *predicate* as a JSON array.
+
+    Args:
+        window_list: Quartz window info dicts, as returned by get_window_list.
+        predicate: Called with each window; falsy results are skipped.
+
+    Returns:
+        JSON string (array) of window objects with keys:
+        pid, window_id, title, subtitle, bounds.
+
+    """
+    windows: list[dict[str, object]] = []
+    # Bind loop-invariant globals and methods to locals (LOAD_FAST in the loop)
+    append, record, empty = windows.append, _window_record, _EMPTY_BOUNDS
+    for window in window_list:
+        # Only windows that are kept need their bounds
+        if predicate(window):
+            append(record(window, window.get("kCGWindowBounds") or empty))
+    return json.dumps(windows, separators=_JSON_SEPARATORS)
+
+
+def _any_window(_window: Mapping[str, Any]) -> bool:
+    """Accept every window."""
+    return True
+
+
+def _has_area(window: Mapping[str, Any]) -> bool:
+    """Accept windows whose width and height are both at least one pixel."""
+    bounds = window.get("kCGWindowBounds") or _EMPTY_BOUNDS
+    return int(bounds.get("Width", 0)) != 0 and int(bounds.get("Height", 0)) != 0
+
 
 @mcp.tool()
 def list_windows(exclude_zero_area: bool = True, only_on_screen: bool = True) -> str:
@@ -67,51 +149,74 @@ def list_windows(exclude_zero_area: bool = True, only_on_screen: bool = True) ->
 
     """
     # Set options for window listing
-    options = kCGWindowListOptionAll
-    if only_on_screen:
-        options = options | kCGWindowListOptionOnScreenOnly | kCGWindowListExcludeDesktopElements
+    options = _OPTS_ONSCREEN if only_on_screen else _OPTS_ALL
 
     # Get window list
-    window_list = CGWindowListCopyWindowInfo(options, kCGNullWindowID)
+    window_list = get_window_list(options)
 
-    windows: list[dict[str, object]] = []
+    return _format_windows(window_list, _has_area if exclude_zero_area else _any_window)
 
-    for window in window_list:
-        # Get window properties
-        pid = window.get("kCGWindowOwnerPID", 0)
-        win_id = window.get("kCGWindowNumber", 0)
 
-        # Get window bounds
-        bounds = window.get("kCGWindowBounds", {})
-        x = int(bounds.get("X", 0))
-        y = int(bounds.get("Y", 0))
-        width = int(bounds.get("Width", 0))
-        height = int(bounds.get("Height", 0))
-
-        # Skip windows with zero area if requested
-        if exclude_zero_area and (width == 0 or height == 0):
-            continue
-
-        # Get window title and owner name
-        title = window.get("kCGWindowOwnerName", "")
-        subtitle = window.get("kCGWindowName", "")
-
-        windows.append(
-            {
-                "pid": int(pid),
-                "window_id": int(win_id),
-                "title": str(title),
-                "subtitle": str(subtitle),
-                "bounds": {
-                    "x": x,
-                    "y": y,
-                    "width": width,
-                    "height": height,
-                },
-            }
-        )
+@functools.cache
+def _screenshot_api() -> SimpleNamespace:
+    """
+    Import the capture and PNG encoding symbols on first use.
+
+    Listing and search tools never need them, so resolving them through the
+    Objective-C bridge is deferred until the first screenshot is taken.
+
+    """
+    from Foundation import NSMutableData
+    from Quartz import (
+        CGDisplayCreateImage,
+        CGGetActiveDisplayList,
+        CGImageDestinationAddImage,
+        CGImageDestinationCreateWithData,
+        CGImageDestinationFinalize,
+        CGMainDisplayID,
+        CGRectNull,
+        CGWindowListCreateImage,
+        kCGImagePropertyPNGCompressionFilter,
+        kCGImagePropertyPNGDictionary,
+        kCGWindowImageBoundsIgnoreFraming,
+        kCGWindowListOptionIncludingWindow,
+    )
+
+    return SimpleNamespace(
+        NSMutableData=NSMutableData,
+        CGDisplayCreateImage=CGDisplayCreateImage,
+        CGGetActiveDisplayList=CGGetActiveDisplayList,
+        CGImageDestinationAddImage=CGImageDestinationAddImage,
+        CGImageDestinationCreateWithData=CGImageDestinationCreateWithData,
+        CGImageDestinationFinalize=CGImageDestinationFinalize,
+        CGMainDisplayID=CGMainDisplayID,
+        CGRectNull=CGRectNull,
+        CGWindowListCreateImage=CGWindowListCreateImage,
+        kCGWindowImageBoundsIgnoreFraming=kCGWindowImageBoundsIgnoreFraming,
+        kCGWindowListOptionIncludingWindow=kCGWindowListOptionIncludingWindow,
+        png_properties={
+            kCGImagePropertyPNGDictionary: {kCGImagePropertyPNGCompressionFilter: _PNG_FILTER_NONE}
+        },
+    )
+
 
-    return json.dumps(windows)
+def _encode_png(image_ref: object) -> memoryview:
+    """
+    Encode a CGImage as PNG using ImageIO with fast (unfiltered) settings.
+
+    The encoded NSData is exposed through the buffer protocol instead of being
+    copied into a new bytes object; McpImage only base64-encodes it.
+
+    """
+    api = _screenshot_api()
+    png_data = api.NSMutableData.data()
+    destination = api.CGImageDestinationCreateWithData(png_data, "public.png", 1, None)
+    if destination is None:
+        raise RuntimeError("Could not create PNG image destination")
+    api.CGImageDestinationAddImage(destination, image_ref, api.png_properties)
+    if not api.CGImageDestinationFinalize(destination):
+        raise RuntimeError("Could not encode PNG image")
+    return memoryview(png_data)
 
 
 @mcp.tool()
@@ -127,36 +232,59 @@ def take_window_screenshot(window_id: int) -> McpImage:
 
     """
     try:
-        # Create a screenshot of the specified window
-        image_ref = CGWindowListCreateImage(
-            CGRectNull,  # Null rect means capture the entire window
-            kCGWindowListOptionIncludingWindow,  # Changed from kCGWindowListOptionAll
-            window_id,  # The specific window ID to capture
-            kCGWindowImageBoundsIgnoreFraming,
-        )
-
-        if not image_ref:
-            return "Error: Could not capture window. The window ID may be invalid."
+        # Drain the capture's autoreleased objects per call so repeated screenshots
+        # don't pile up multi-megabyte CGImages until the next outer pool drain
+        with objc.autorelease_pool():
+            # Create a screenshot of the specified window
+            api = _screenshot_api()
+            image_ref = api.CGWindowListCreateImage(
+                api.CGRectNull,  # Null rect means capture the entire window
+                api.kCGWindowListOptionIncludingWindow,  # Changed from kCGWindowListOptionAll
+                window_id,  # The specific window ID to capture
+                api.kCGWindowImageBoundsIgnoreFraming,
+            )
 
-        # Convert the CGImage to PNG data
-        bitmap_rep = NSBitmapImageRep.alloc().initWithCGImage_(image_ref)
-        png_data = bitmap_rep.representationUsingType_properties_(3, None)  # 3 = NSPNGFileType
+            if not image_ref:
+                return "Error: Could not capture window. The window ID may be invalid."
 
-        # Convert to bytes and create an MCP Image
-        png_bytes = bytes(png_data)
+            # Convert the CGImage to PNG data, then drop the raw bitmap
+            png_data = _encode_png(image_ref)
+            del image_ref
 
         # Return JSON derived from ImageContent
-        # image_content = McpImage(data=png_bytes, format="png").to_image_content()
+        # image_content = McpImage(data=png_data, format="png").to_image_content()
         # return image_content.model_dump()
 
         # Return the image
-        return McpImage(data=png_bytes, format="png")
+        return McpImage(data=png_data, format="png")
 
     except Exception as e:
         logger.error(f"Error taking screenshot: {e!s}")
         return f"Error taking screenshot: {e!s}"
 
 
+def _capture_screen() -> object:
+    """
+    Capture the entire screen as a CGImage.
+
+    With a single active display the framebuffer is copied directly, which is far
+    cheaper for the WindowServer than re-compositing every on-screen window.
+    Multi-display setups keep the window-list capture of the whole desktop.
+
+    """
+    api = _screenshot_api()
+    error, _displays, display_count = api.CGGetActiveDisplayList(2, None, None)
+    if error == 0 and display_count == 1:
+        return api.CGDisplayCreateImage(api.CGMainDisplayID())
+
+    return api.CGWindowListCreateImage(
+        api.CGRectNull,  # Null rect means capture the entire screen
+        kCGWindowListOptionOnScreenOnly,
+        kCGNullWindowID,  # Null window ID means all windows
+        api.kCGWindowImageBoundsIgnoreFraming,
+    )
+
+
 @mcp.tool()
 def take_fullscreen_screenshot() -> McpImage:
     """
@@ -167,26 +295,19 @@ def take_fullscreen_screenshot() -> McpImage:
 
     """
     try:
-        # Create a screenshot of the entire screen
-        image_ref = CGWindowListCreateImage(
-            CGRectNull,  # Null rect means capture the entire screen
-            kCGWindowListOptionOnScreenOnly,
-            kCGNullWindowID,  # Null window ID means all windows
-            kCGWindowImageBoundsIgnoreFraming,
-        )
-
-        if not image_ref:
-            return "Error: Could not capture screen."
+        with objc.autorelease_pool():
+            # Create a screenshot of the entire screen
+            image_ref = _capture_screen()
 
-        # Convert the CGImage to PNG data
-        bitmap_rep = NSBitmapImageRep.alloc().initWithCGImage_(image_ref)
-        png_data = bitmap_rep.representationUsingType_properties_(3, None)  # 3 = NSPNGFileType
+            if not image_ref:
+                return "Error: Could not capture screen."
 
-        # Convert to bytes and create an MCP Image
-        png_bytes = bytes(png_data)
+            # Convert the CGImage to PNG data, then drop the raw bitmap
+            png_data = _encode_png(image_ref)
+            del image_ref
 
         # Return the image
-        return McpImage(data=png_bytes, format="png")
+        return McpImage(data=png_data, format="png")
 
     except Exception as e:
         logger.error(f"Error taking screenshot: {e!s}")
@@ -194,12 +315,13 @@ def take_fullscreen_screenshot() -> McpImage:
 
 
 @mcp.tool()
-def find_windows_by_title(title_search: str) -> str:
+def find_windows_by_title(title_search: str, only_on_screen: bool = True) -> str:
     """
     Find windows by searching in their titles.
 
     Args:
         title_search: Text to search for in window titles and application names.
+        only_on_screen: If True, only windows currently on screen are searched.
 
     Returns:
         JSON string (array) of matching window objects with keys:
@@ -207,43 +329,22 @@ def find_windows_by_title(title_search: str) -> str:
         bounds is an object with: x, y, width, height.
 
     """
-    title_search = title_search.lower()
-
-    # Get window list
-    window_list = CGWindowListCopyWindowInfo(kCGWindowListOptionAll, kCGNullWindowID)
+    # Compiled once; the regex engine matches case-insensitively without
+    # materializing lowered copies of every title.
+    search = re.compile(re.escape(title_search), re.IGNORECASE).search
 
-    # Build JSON result
-    matches: list[dict[str, object]] = []
+    # Set options for window listing
+    options = _OPTS_ONSCREEN if only_on_screen else _OPTS_ALL
 
-    for window in window_list:
-        # Get window properties
-        pid = window.get("kCGWindowOwnerPID", 0)
-        win_id = window.get("kCGWindowNumber", 0)
+    # Get window list
+    window_list = get_window_list(options)
 
-        # Get window title and owner name
-        title = window.get("kCGWindowOwnerName", "")
-        subtitle = window.get("kCGWindowName", "")
-
-        # Check if the search term is in the title or subtitle
-        if title_search in title.lower() or title_search in subtitle.lower():
-            # Get window bounds
-            bounds = window.get("kCGWindowBounds", {})
-            x = int(bounds.get("X", 0))
-            y = int(bounds.get("Y", 0))
-            width = int(bounds.get("Width", 0))
-            height = int(bounds.get("Height", 0))
-
-            matches.append(
-                {
-                    "pid": int(pid),
-                    "window_id": int(win_id),
-                    "title": str(title),
-                    "subtitle": str(subtitle),
-                    "bounds": {"x": x, "y": y, "width": width, "height": height},
-                }
-            )
+    def title_matches(window: Mapping[str, Any]) -> object:
+        return search(window.get("kCGWindowOwnerName", "")) or search(
+            window.get("kCGWindowName", "")
+        )
 
-    return json.dumps(matches)
+    return _format_windows(window_list, title_matches if title_search else _any_window)
 
 
 # Register custom handlers for specific transports
@@ -270,6 +371,23 @@ original_run = mcp.run
 
 
 # Override run to add shutdown handling
+def _run_shutdown(reason: ShutdownReason) -> None:
+    """
+    Run the graceful shutdown sequence from synchronous code.
+
+    The server's event loop has already exited by the time run() raises, so the
+    sequence needs a loop of its own. That loop is only created when shutdown
+    has not already been started (typically by the signal handler).
+
+    Args:
+        reason: Reason for shutdown
+
+    """
+    if shutdown_manager.status is not ShutdownStatus.NOT_STARTED:
+        return
+    asyncio.run(shutdown_manager.shutdown(reason))
+
+
 def run_with_shutdown(*args: object, **kwargs: object) -> ReturnT:
     """
     Wrap the original run method with shutdown handling.
@@ -285,8 +403,9 @@ def run_with_shutdown(*args: object, **kwargs: object) -> ReturnT:
         Result from the original run method
 
     """
-    # Set up signal handlers
-    graceful_shutdown.setup_signal_handlers()
+    # Set up signal handlers for the transport being started
+    transport = kwargs.get("transport", args[0] if args else "stdio")
+    graceful_shutdown.setup_signal_handlers(str(transport))
 
     try:
         # Call original run method
@@ -294,17 +413,13 @@ def run_with_shutdown(*args: object, **kwargs: object) -> ReturnT:
         return cast(ReturnT, result)
     except KeyboardInterrupt:
         # Handle KeyboardInterrupt gracefully
-        import asyncio
-
-        asyncio.run(shutdown_manager.shutdown(ShutdownReason.SIGNAL))
+        _run_shutdown(ShutdownReason.SIGNAL)
         # TypeVar workaround for the case when KeyboardInterrupt is raised
         return cast(ReturnT, None)
     except Exception as e:
         logger.error(f"Error during server execution: {e}")
         # Handle other exceptions with graceful shutdown
-        import asyncio
-
-        asyncio.run(shutdown_manager.shutdown(ShutdownReason.ERROR))
+        _run_shutdown(ShutdownReason.ERROR)
         raise
     finally:
         # Restore signal handlers
@@ -7,16 +7,22 @@ and final exit with appropriate status codes.
 """
 
 import asyncio
+import contextlib
+import inspect
 import logging
 import sys
-from collections.abc import Callable
+from collections.abc import Callable, Coroutine, Iterable
 from enum import Enum, auto
-from typing import Any
+from typing import Protocol
+from weakref import WeakValueDictionary
 
 from signal_handler import graceful_shutdown
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on connections being closed at the same time during shutdown
+_MAX_CONCURRENT_CLOSES = 64
+
 
 class ShutdownReason(Enum):
     """Reasons for server shutdown."""
@@ -38,6 +44,13 @@ class ShutdownStatus(Enum):
     FAILED = auto()  # Shutdown failed
 
 
+class Closeable(Protocol):
+    """A tracked connection that can be closed during shutdown."""
+
+    async def close(self) -> None:
+        """Close the connection."""
+
+
 class ServerShutdownManager:
     """
     Manager for MCP server graceful shutdown across different transport types.
@@ -63,22 +76,27 @@ class ServerShutdownManager:
         self._transport_shutdown_hooks: dict[str, Callable] = {}
         self._post_shutdown_hooks: list[Callable] = []
 
-        # Track active connections
-        self.active_connections: dict[str, Any] = {}
+        # Track active connections. Values are weak so connections that are
+        # dropped without remove_active_connection() evict themselves.
+        self.active_connections: WeakValueDictionary[str, Closeable] = WeakValueDictionary()
 
         # Exit code to use when terminating
         self.exit_code = 0
 
+        # Shutdown task started by a signal, if any
+        self._signal_task: asyncio.Task[bool] | None = None
+
         # Register with global signal handler
         graceful_shutdown.register_shutdown_hook("server_shutdown", self._handle_signal_shutdown)
 
-    def add_active_connection(self, conn_id: str, conn_obj: object) -> None:
+    def add_active_connection(self, conn_id: str, conn_obj: Closeable) -> None:
         """
         Track an active connection.
 
         Args:
             conn_id: Unique identifier for the connection
-            conn_obj: The connection object
+            conn_obj: The connection object, closed with ``await conn_obj.close()``.
+                Only a weak reference is kept, so it must support weakrefs.
 
         """
         self.active_connections[conn_id] = conn_obj
@@ -91,8 +109,7 @@ class ServerShutdownManager:
             conn_id: Connection identifier to remove
 
         """
-        if conn_id in self.active_connections:
-            del self.active_connections[conn_id]
+        self.active_connections.pop(conn_id, None)
 
     def register_pre_shutdown_hook(self, hook: Callable) -> None:
         """
@@ -140,96 +157,199 @@ class ServerShutdownManager:
 
         """
         if self.status != ShutdownStatus.NOT_STARTED:
-            logger.error(f"Shutdown already in progress with status {self.status}")
+            logger.error("Shutdown already in progress with status %s", self.status)
             return False
 
         self.status = ShutdownStatus.IN_PROGRESS
         self.reason = reason
         timeout = timeout or self.default_timeout
 
+        # One deadline bounds the whole sequence. A stage that runs out of time
+        # is logged and the remaining stages still run, so every hook is called.
+        deadline = asyncio.get_running_loop().time() + timeout
+        timed_out = False
+
         try:
-            # Run pre-shutdown hooks
-            for hook in self._pre_shutdown_hooks:
-                try:
-                    result = hook()
-                    # Handle both regular and coroutine functions
-                    if asyncio.iscoroutine(result):
-                        await result
-                except Exception as e:
-                    logger.error(f"Error in pre-shutdown hook {hook.__name__}: {e}")
+            # Hooks within a stage are independent, so each stage runs them
+            # concurrently and takes as long as its slowest hook.
+            timed_out |= await self._run_hooks(
+                deadline,
+                "pre-shutdown hook",
+                [(getattr(hook, "__name__", hook), hook) for hook in self._pre_shutdown_hooks],
+            )
 
             # Close active connections
-            await self._close_active_connections(timeout)
+            timed_out |= await self._close_active_connections(deadline)
 
             # Run transport-specific shutdown hooks
-            for transport_name, hook in self._transport_shutdown_hooks.items():
-                try:
-                    result = hook()
-                    if asyncio.iscoroutine(result):
-                        await result
-                except Exception as e:
-                    logger.error(f"Error in transport shutdown hook for {transport_name}: {e}")
+            timed_out |= await self._run_hooks(
+                deadline, "transport shutdown hook for", self._transport_shutdown_hooks.items()
+            )
 
             # Run post-shutdown hooks
-            for hook in self._post_shutdown_hooks:
-                try:
-                    result = hook()
-                    if asyncio.iscoroutine(result):
-                        await result
-                except Exception as e:
-                    logger.error(f"Error in post-shutdown hook {hook.__name__}: {e}")
-
-            self.status = ShutdownStatus.COMPLETED
-            return True
+            timed_out |= await self._run_hooks(
+                deadline,
+                "post-shutdown hook",
+                [(getattr(hook, "__name__", hook), hook) for hook in self._post_shutdown_hooks],
+            )
+        except Exception as e:
+            self.status = ShutdownStatus.FAILED
+            self.exit_code = 2
+            logger.error("Shutdown failed: %s", e)
+            return False
 
-        except TimeoutError:
+        if timed_out:
             self.status = ShutdownStatus.FORCED
             self.exit_code = 1
-            logger.error(f"Shutdown timed out after {timeout}s")
+            logger.error("Shutdown timed out after %ss", timeout)
             return False
-        except Exception as e:
-            self.status = ShutdownStatus.FAILED
-            self.exit_code = 2
-            logger.error(f"Shutdown failed: {e}")
+
+        self.status = ShutdownStatus.COMPLETED
+        return True
+
+    async def _run_hooks(
+        self, deadline: float, stage: str, hooks: Iterable[tuple[object, Callable]]
+    ) -> bool:
+        """
+        Run one stage of shutdown hooks concurrently.
+
+        Every hook is called even if the deadline has already passed; only
+        waiting for the coroutines returned by async hooks is bounded.
+
+        Args:
+            deadline: Event loop time by which the stage has to finish
+            stage: Kind of hook, used in error logs (e.g. 'pre-shutdown hook')
+            hooks: (name, hook) pairs; the name is used in error logs
+
+        Returns:
+            True if the stage ran out of time, False otherwise
+
+        """
+        pending: list[tuple[object, Coroutine]] = []
+        for name, hook in hooks:
+            result = self._invoke(stage, name, hook)
+            if result is not None:
+                pending.append((name, result))
+
+        if not pending:
             return False
 
-    async def _close_active_connections(self, timeout: float) -> None:
+        # Started anyway: hooks that finish without suspending still complete
+        expired = asyncio.get_running_loop().time() >= deadline
+        tasks: list[tuple[object, asyncio.Task]] = []
+        with contextlib.suppress(TimeoutError):
+            async with asyncio.timeout_at(deadline), asyncio.TaskGroup() as tg:
+                for name, coro in pending:
+                    tasks.append((name, tg.create_task(self._await_hook(stage, name, coro))))
+
+        # Only hooks that were actually cut off count as a timeout
+        timed_out = False
+        for name, task in tasks:
+            if not task.cancelled():
+                continue
+            if expired:
+                logger.error("Skipped %s %s: shutdown deadline already passed", stage, name)
+            else:
+                logger.error("Timed out waiting for %s %s", stage, name)
+            timed_out = True
+        return timed_out
+
+    @staticmethod
+    def _invoke(stage: str, name: object, hook: Callable) -> Coroutine | None:
+        """
+        Call a shutdown hook, returning its coroutine if it is async.
+
+        Errors are logged rather than raised so one failing hook cannot stop the others.
+
+        Args:
+            stage: Kind of hook, for error messages
+            name: Name of the hook, for error messages
+            hook: Function to call
+
+        Returns:
+            The coroutine returned by the hook, or None
+
+        """
+        try:
+            result = hook()
+        except Exception as e:
+            logger.error("Error in %s %s: %s", stage, name, e)
+            return None
+        # Handle both regular and coroutine functions
+        return result if asyncio.iscoroutine(result) else None
+
+    @staticmethod
+    async def _await_hook(stage: str, name: object, coro: Coroutine) -> None:
+        """
+        Await the coroutine returned by an async shutdown hook, logging its errors.
+
+        Args:
+            stage: Kind of hook, for error messages
+            name: Name of the hook, for error messages
+            coro: Coroutine returned by the hook
+
+        """
+        try:
+            await coro
+        except Exception as e:
+            logger.error("Error in %s %s: %s", stage, name, e)
+
+    async def _close_active_connections(self, deadline: float) -> bool:
         """
-        Close all active connections with a timeout.
+        Close all active connections before a deadline.
 
         Args:
-            timeout: Maximum time to wait for connections to close
+            deadline: Event loop time by which the connections have to be closed
+
+        Returns:
+            True if closing ran out of time, False otherwise
 
         """
         if not self.active_connections:
-            return
+            return False
 
-        close_tasks = []
+        # A fixed pool of workers drains the connections, so only a bounded
+        # number of tasks and in-flight closes exist however many are tracked.
+        connections = iter(list(self.active_connections.items()))
 
-        for conn_id, conn in self.active_connections.items():
-            if hasattr(conn, "close") and callable(conn.close):
+        async def close_worker() -> None:
+            for conn_id, conn in connections:
                 try:
-                    close_method = conn.close()
-                    if asyncio.iscoroutine(close_method):
-                        close_tasks.append(asyncio.create_task(close_method))
+                    # Tolerate connections whose close() is synchronous
+                    result = conn.close()
+                    if inspect.isawaitable(result):
+                        await result
                 except Exception as e:
-                    logger.error(f"Error scheduling close for connection {conn_id}: {e}")
-
-        if close_tasks:
-            done, pending = await asyncio.wait(close_tasks, timeout=timeout)
-
-            if pending:
-                logger.error(f"{len(pending)} connection close operations timed out")
-                for task in pending:
-                    task.cancel()
+                    logger.error("Error closing connection %s: %s", conn_id, e)
+
+        workers = min(_MAX_CONCURRENT_CLOSES, len(self.active_connections))
+        # Started anyway: closes that finish without suspending still complete
+        expired = asyncio.get_running_loop().time() >= deadline
+        tasks: list[asyncio.Task] = []
+        with contextlib.suppress(TimeoutError):
+            async with asyncio.timeout_at(deadline), asyncio.TaskGroup() as tg:
+                tasks.extend(tg.create_task(close_worker()) for _ in range(workers))
+
+        # Only a worker cut off mid-close counts as a timeout
+        if not any(task.cancelled() for task in tasks):
+            return False
+        if expired:
+            logger.error("Skipped closing active connections: shutdown deadline already passed")
+        else:
+            logger.error("Closing active connections timed out")
+        return True
 
     def _handle_signal_shutdown(self) -> None:
         """Handle shutdown triggered by signal handler."""
-        loop = asyncio.get_event_loop()
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Nothing could run the graceful shutdown or the force-exit timer
+            logger.error("No running event loop at signal time, exiting immediately")
+            sys.exit(1)
 
-        # Create the shutdown task - we don't need the reference but create_task requires it
-        # Disable RUF006 since we intentionally don't use the task later
-        _ = asyncio.create_task(self.shutdown(ShutdownReason.SIGNAL))  # noqa: RUF006
+        # Keep a reference so the task cannot be garbage collected mid-shutdown
+        self._signal_task = loop.create_task(self.shutdown(ShutdownReason.SIGNAL))
 
         # Add a timeout to force exit if shutdown doesn't complete
         shutdown_timeout = self.default_timeout * 1.5  # Give a bit extra time
@@ -247,3 +367,11 @@ class ServerShutdownManager:
 
 # Create a default shutdown manager
 shutdown_manager = ServerShutdownManager()
+
+__all__ = [
+    "Closeable",
+    "ServerShutdownManager",
+    "ShutdownReason",
+    "ShutdownStatus",
+    "shutdown_manager",
+]
@@ -5,74 +5,201 @@ This module provides utilities for handling system signals (SIGINT, SIGTERM)
 to enable graceful shutdown of the MCP server across different transport types.
 """
 
+import _thread
 import asyncio
+import contextlib
+import functools
+import inspect
 import logging
+import os
 import signal
-from collections.abc import Callable
-from types import FrameType
-from typing import Any
+import threading
+from collections.abc import Callable, Coroutine
 
 logger = logging.getLogger(__name__)
 
+# Signals that trigger a graceful shutdown
+_SHUTDOWN_SIGNALS = frozenset({signal.SIGINT, signal.SIGTERM})
+
+# Names of those signals for log messages, resolved once
+_SIG_NAMES = {sig: sig.name for sig in _SHUTDOWN_SIGNALS}
+
+
+def make_safe_hook(
+    hook: Callable, description: str, log: logging.Logger = logger
+) -> Callable[[], object]:
+    """
+    Wrap a shutdown hook so that calling it never raises.
+
+    Args:
+        hook: Function to wrap
+        description: Name of the hook used in the error message
+        log: Logger that receives "Error in <description>: ..." on failure
+
+    Returns:
+        A function returning the hook's result (possibly a coroutine), or None
+        if the hook raised.
+
+    """
+
+    def safe_hook() -> object:
+        try:
+            return hook()
+        except Exception as e:
+            log.error("Error in %s: %s", description, e)
+            return None
+
+    return safe_hook
+
 
 class GracefulShutdown:
     """
     Utility class for handling graceful shutdown across different transport types.
 
-    This class sets up signal handlers for graceful termination and provides
-    a coordinated way to shut down the MCP server regardless of transport.
+    This class receives termination signals (on a dedicated thread for stdio)
+    and provides a coordinated way to shut down the MCP server regardless of
+    transport.
     """
 
     def __init__(self) -> None:
         """Initialize the graceful shutdown handler with default values."""
-        self.shutdown_event = asyncio.Event()
-        self.original_handlers: dict[int, Any] = {}
-        self._shutdown_hooks: dict[str, Callable] = {}
+        # Created on first use, see shutdown_event
+        self._shutdown_event: asyncio.Event | None = None
+        # (name, hook, is async) in registration order, hooks wrapped by make_safe_hook
+        self._shutdown_hooks: list[tuple[str, Callable[[], object], bool]] = []
         self._is_shutting_down = False
+        self._hook_results: asyncio.Future | None = None
 
-    def setup_signal_handlers(self) -> None:
-        """Set up handlers for SIGINT and SIGTERM."""
-        # Store original handlers
-        self.original_handlers[signal.SIGINT] = signal.getsignal(signal.SIGINT)
-        self.original_handlers[signal.SIGTERM] = signal.getsignal(signal.SIGTERM)
+        # Event loop that shutdown work is dispatched to, see bind_loop()
+        self._loop: asyncio.AbstractEventLoop | None = None
 
-        # Set new handlers
-        signal.signal(signal.SIGINT, self._handle_shutdown_signal)
-        signal.signal(signal.SIGTERM, self._handle_shutdown_signal)
+        # Thread collecting SIGINT / SIGTERM with sigwait()
+        self._signal_thread: threading.Thread | None = None
+        self._stop_signal_thread = False
 
-    def _handle_shutdown_signal(self, sig: int, frame: FrameType | None) -> None:
+        # Handlers replaced for the uvicorn transports, see setup_signal_handlers()
+        self._original_handlers: dict[int, Callable | int | None] = {}
+
+    def bind_loop(self, loop: asyncio.AbstractEventLoop) -> None:
         """
-        Handle termination signals (SIGINT, SIGTERM).
+        Run signal-triggered shutdown work on *loop*.
 
         Args:
-            sig: Signal number
-            frame: Current stack frame
+            loop: The event loop serving MCP requests
+
+        """
+        self._loop = loop
+
+    def setup_signal_handlers(self, transport: str = "stdio") -> None:
+        """
+        Set up SIGINT and SIGTERM handling for *transport*.
+
+        For stdio the signals are blocked in the calling thread, and therefore in
+        every thread it starts afterwards, and a daemon thread collects them with
+        sigwait(). No Python-level signal handler interrupts the main thread.
+
+        The sse and streamable-http transports run under uvicorn, which installs
+        its own handlers while serving and re-raises the signal once it has shut
+        down. The signals stay deliverable there, and both are mapped to
+        KeyboardInterrupt so that the re-raised signal unwinds the main thread
+        through the shutdown path of run_with_shutdown.
+
+        Call this from the main thread before the server starts.
+
+        Args:
+            transport: Transport the server is started with
 
         """
-        sig_name = signal.Signals(sig).name
+        if self._signal_thread is not None or self._original_handlers:
+            return
+
+        if transport != "stdio":
+            for sig in _SHUTDOWN_SIGNALS:
+                self._original_handlers[sig] = signal.signal(sig, signal.default_int_handler)
+            return
+
+        with contextlib.suppress(RuntimeError):
+            self._loop = asyncio.get_running_loop()
 
+        signal.pthread_sigmask(signal.SIG_BLOCK, _SHUTDOWN_SIGNALS)
+        self._stop_signal_thread = False
+        self._signal_thread = threading.Thread(
+            target=self._wait_for_signals, name="shutdown-signals", daemon=True
+        )
+        self._signal_thread.start()
+
+    def _wait_for_signals(self) -> None:
+        """Collect shutdown signals until restore_signal_handlers() stops the thread."""
+        while True:
+            sig = signal.sigwait(_SHUTDOWN_SIGNALS)
+            if self._stop_signal_thread:
+                return
+            self._dispatch_signal(sig)
+
+    def _dispatch_signal(self, sig: int) -> None:
+        """
+        Act on a shutdown signal received by the signal thread.
+
+        Args:
+            sig: Signal number
+
+        """
         if self._is_shutting_down:
             # If we're already shutting down, another signal means force exit
-            logger.error(f"Received {sig_name} again during shutdown. Forcing exit.")
-            # Restore original handler and re-raise signal
-            signal.signal(sig, self.original_handlers[sig])
-            signal.raise_signal(sig)
+            self._force_exit(sig)
             return
 
         self._is_shutting_down = True
 
-        # Set asyncio event to coordinate shutdown across async code
-        if not self.shutdown_event.is_set():
-            try:
-                loop = asyncio.get_running_loop()
-                loop.call_soon_threadsafe(self.shutdown_event.set)
-            except RuntimeError:
-                # No event loop running, just set the event
-                self.shutdown_event.set()
+        # Hand the event and the hooks to the loop in a single callback
+        loop = self._loop
+        if loop is not None and loop.is_running():
+            with contextlib.suppress(RuntimeError):  # closed since the check
+                loop.call_soon_threadsafe(self._begin_shutdown)
+                return
+
+        # No loop to shut down on (not started yet, or already gone): unwind the
+        # main thread through the KeyboardInterrupt path of run_with_shutdown.
+        _thread.interrupt_main()
+
+    def _begin_shutdown(self) -> None:
+        """Set the shutdown event and run the registered shutdown hooks."""
+        # Set asyncio event to coordinate shutdown across async code. Nobody can
+        # be waiting on it if it was never created, and creating it later sets it.
+        if self._shutdown_event is not None:
+            self._shutdown_event.set()
 
         # Run any registered shutdown hooks
         self._run_shutdown_hooks()
 
+    @staticmethod
+    def _force_exit(sig: int) -> None:
+        """
+        Terminate the process immediately.
+
+        This runs on the signal thread, so it works even if the event loop or the
+        main thread is stuck.
+
+        Args:
+            sig: Signal number
+
+        """
+        logger.error("Received %s again during shutdown. Forcing exit.", _SIG_NAMES.get(sig, sig))
+        os._exit(128 + sig)
+
+    @property
+    def shutdown_event(self) -> asyncio.Event:
+        """Event that is set once shutdown has started, created on first access."""
+        if self._shutdown_event is None:
+            self._shutdown_event = asyncio.Event()
+            if self._is_shutting_down:
+                self._shutdown_event.set()
+        return self._shutdown_event
+
+    async def wait_shutdown(self) -> None:
+        """Wait until shutdown has started."""
+        await self.shutdown_event.wait()
+
     def is_shutting_down(self) -> bool:
         """Return True if shutdown is in progress."""
         return self._is_shutting_down
@@ -86,20 +213,92 @@ class GracefulShutdown:
             hook: Callable that will be executed during shutdown
 
         """
-        self._shutdown_hooks[name] = hook
+        entry = (
+            name,
+            make_safe_hook(hook, f"shutdown hook {name}"),
+            inspect.iscoroutinefunction(hook),
+        )
+
+        # Re-registering a name replaces its hook in place
+        for index, (existing, *_) in enumerate(self._shutdown_hooks):
+            if existing == name:
+                self._shutdown_hooks[index] = entry
+                return
+        self._shutdown_hooks.append(entry)
 
     def _run_shutdown_hooks(self) -> None:
         """Run all registered shutdown hooks."""
-        for name, hook in self._shutdown_hooks.items():
-            try:
-                hook()
-            except Exception as e:
-                logger.error(f"Error in shutdown hook {name}: {e}")
+        pending: list[tuple[str, Coroutine]] = []
+        for name, hook, is_async in self._shutdown_hooks:
+            # Hooks are wrapped at registration, so errors are already logged
+            result = hook()
+            if result is None:
+                continue
+            # Only sync hooks that return something need the runtime probe
+            if is_async or asyncio.iscoroutine(result):
+                pending.append((name, result))
+
+        if pending:
+            self._gather_async_hooks(pending)
+
+    def _gather_async_hooks(self, pending: list[tuple[str, Coroutine]]) -> None:
+        """
+        Run coroutines returned by shutdown hooks concurrently on the running loop.
+
+        Args:
+            pending: (hook name, coroutine) pairs
+
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            for name, coro in pending:
+                coro.close()
+                logger.error("Shutdown hook %s is async but no event loop is running", name)
+            return
+
+        # Keep a reference so the tasks are not garbage collected while running
+        self._hook_results = asyncio.gather(
+            *(loop.create_task(coro) for _, coro in pending), return_exceptions=True
+        )
+        self._hook_results.add_done_callback(
+            functools.partial(self._log_async_hook_errors, [name for name, _ in pending])
+        )
+
+    @staticmethod
+    def _log_async_hook_errors(names: list[str], results: asyncio.Future) -> None:
+        """
+        Log the errors raised by async shutdown hooks.
+
+        Args:
+            names: Hook names, in the order the coroutines were gathered
+            results: Future returned by asyncio.gather
+
+        """
+        if results.cancelled():
+            return
+        for name, result in zip(names, results.result(), strict=True):
+            if isinstance(result, Exception):
+                logger.error("Error in shutdown hook %s: %s", name, result)
 
     def restore_signal_handlers(self) -> None:
-        """Restore original signal handlers."""
-        for sig, handler in self.original_handlers.items():
+        """Undo setup_signal_handlers()."""
+        for sig, handler in self._original_handlers.items():
             signal.signal(sig, handler)
+        self._original_handlers.clear()
+
+        # Stop the signal thread and unblock SIGINT and SIGTERM again
+        thread, self._signal_thread = self._signal_thread, None
+        if thread is None:
+            return
+
+        # Wake the thread out of sigwait() with a signal it is waiting for
+        self._stop_signal_thread = True
+        if thread.is_alive():
+            signal.pthread_kill(thread.ident, signal.SIGTERM)
+        thread.join()
+
+        signal.pthread_sigmask(signal.SIG_UNBLOCK, _SHUTDOWN_SIGNALS)
 
 
 # Singleton instance
@@ -7,14 +7,47 @@ ensuring proper resource cleanup during shutdown and maintaining connection stat
 
 import asyncio
 import contextlib
+import inspect
 import logging
-from collections.abc import Callable
+from collections.abc import Callable, Coroutine
 from typing import Any
 
 from server_shutdown import shutdown_manager
+from signal_handler import make_safe_hook
 
 logger = logging.getLogger(__name__)
 
+# Overall time budget and concurrency cap for the SSE transport shutdown
+_SESSION_CLOSE_TIMEOUT = 3.0
+_MAX_CONCURRENT_SESSION_CLOSES = 256
+
+
+def _bound_callable(obj: object, name: str) -> Callable | None:
+    """Return ``obj.<name>`` if it exists and is callable, otherwise None."""
+    attr = getattr(obj, name, None)
+    return attr if callable(attr) else None
+
+
+def _stream_closer(stream: object) -> tuple[Callable, bool] | None:
+    """
+    Resolve how to close a stream.
+
+    Args:
+        stream: A read or write stream
+
+    Returns:
+        (close function, whether it is the async aclose) or None if the stream
+        has no close method.
+
+    """
+    aclose = _bound_callable(stream, "aclose")
+    if aclose is not None:
+        return aclose, True
+    close = _bound_callable(stream, "close")
+    if close is not None:
+        return close, False
+    return None
+
 
 class TransportShutdownHandler:
     """Base class for transport-specific shutdown handlers."""
@@ -28,7 +61,9 @@ class TransportShutdownHandler:
 
         """
         self.transport_name = transport_name
-        self._shutdown_callbacks: dict[str, Callable] = {}
+        # (name, callback, is async) in registration order, callbacks wrapped by
+        # make_safe_hook
+        self._shutdown_callbacks: list[tuple[str, Callable[[], object], bool]] = []
 
         # Register this handler with the shutdown manager
         shutdown_manager.register_transport_shutdown_hook(transport_name, self.handle_shutdown)
@@ -42,19 +77,44 @@ class TransportShutdownHandler:
             callback: Function to call during shutdown
 
         """
-        self._shutdown_callbacks[name] = callback
+        entry = (
+            name,
+            make_safe_hook(callback, f"{self.transport_name} shutdown callback {name}", logger),
+            inspect.iscoroutinefunction(callback),
+        )
+
+        # Re-registering a name replaces its callback in place
+        for index, (existing, *_) in enumerate(self._shutdown_callbacks):
+            if existing == name:
+                self._shutdown_callbacks[index] = entry
+                return
+        self._shutdown_callbacks.append(entry)
 
     async def handle_shutdown(self) -> None:
         """Handle transport-specific shutdown. Override in subclasses."""
-        # Call all registered callbacks
-        for name, callback in self._shutdown_callbacks.items():
-            try:
-                result = callback()
-                if asyncio.iscoroutine(result):
-                    await result
-
-            except Exception as e:
-                logger.error(f"Error in {self.transport_name} shutdown callback {name}: {e}")
+        if not self._shutdown_callbacks:
+            return
+
+        # Call all registered callbacks, collecting async ones to await together
+        pending: list[tuple[str, Coroutine]] = []
+        for name, callback, is_async in self._shutdown_callbacks:
+            # Callbacks are wrapped at registration, so errors are already logged
+            result = callback()
+            if result is None:
+                continue
+            # Only sync callbacks that return something need the runtime probe
+            if is_async or asyncio.iscoroutine(result):
+                pending.append((name, result))
+
+        if not pending:
+            return
+
+        results = await asyncio.gather(*(coro for _, coro in pending), return_exceptions=True)
+        for (name, _), result in zip(pending, results, strict=True):
+            if isinstance(result, Exception):
+                logger.error(
+                    "Error in %s shutdown callback %s: %s", self.transport_name, name, result
+                )
 
 
 class StdioTransportHandler(TransportShutdownHandler):
@@ -65,6 +125,8 @@ class StdioTransportHandler(TransportShutdownHandler):
         super().__init__("stdio")
         self.read_stream: Any | None = None
         self.write_stream: Any | None = None
+        # (stream label, close function, is async) resolved once in set_streams
+        self._stream_closers: list[tuple[str, Callable, bool]] = []
 
     def set_streams(self, read_stream: object, write_stream: object) -> None:
         """
@@ -78,6 +140,13 @@ class StdioTransportHandler(TransportShutdownHandler):
         self.read_stream = read_stream
         self.write_stream = write_stream
 
+        # Close the write side first, then the read side
+        self._stream_closers = [
+            (label, *closer)
+            for label, stream in (("write", write_stream), ("read", read_stream))
+            if stream and (closer := _stream_closer(stream)) is not None
+        ]
+
     async def handle_shutdown(self) -> None:
         """
         Handle STDIO transport shutdown.
@@ -85,29 +154,19 @@ class StdioTransportHandler(TransportShutdownHandler):
         This method specifically addresses the BrokenResourceError that occurs
         when shutting down stdio streams.
         """
-        # Call parent method to run registered callbacks
-        await super().handle_shutdown()
+        # Call parent method to run registered callbacks, if there are any
+        if self._shutdown_callbacks:
+            await super().handle_shutdown()
 
         # Gracefully close streams if they exist
-        if self.write_stream:
-            with contextlib.suppress(Exception):
-                if hasattr(self.write_stream, "aclose") and callable(self.write_stream.aclose):
-                    try:
-                        await self.write_stream.aclose()
-                    except Exception as e:
-                        logger.debug(f"Expected error closing write stream: {e}")
-                elif hasattr(self.write_stream, "close") and callable(self.write_stream.close):
-                    self.write_stream.close()
-
-        if self.read_stream:
-            with contextlib.suppress(Exception):
-                if hasattr(self.read_stream, "aclose") and callable(self.read_stream.aclose):
-                    try:
-                        await self.read_stream.aclose()
-                    except Exception as e:
-                        logger.debug(f"Expected error closing read stream: {e}")
-                elif hasattr(self.read_stream, "close") and callable(self.read_stream.close):
-                    self.read_stream.close()
+        for label, close, is_async in self._stream_closers:
+            # One handler per stream so a failing close never skips the next one
+            try:
+                result = close()
+                if is_async:
+                    await result
+            except Exception as e:
+                logger.debug("Expected error closing %s stream: %s", label, e)
 
 
 class SseTransportHandler(TransportShutdownHandler):
@@ -116,7 +175,8 @@ class SseTransportHandler(TransportShutdownHandler):
     def __init__(self) -> None:
         """Initialize the SSE transport handler."""
         super().__init__("sse")
-        self.active_sessions = {}
+        # session id -> (send_close_notification, close), resolved at registration
+        self.active_sessions: dict[str, tuple[Callable | None, Callable | None]] = {}
 
     def register_session(self, session_id: str, session_obj: object) -> None:
         """
@@ -127,7 +187,10 @@ class SseTransportHandler(TransportShutdownHandler):
             session_obj: Session object to be closed during shutdown
 
         """
-        self.active_sessions[session_id] = session_obj
+        self.active_sessions[session_id] = (
+            _bound_callable(session_obj, "send_close_notification"),
+            _bound_callable(session_obj, "close"),
+        )
 
     def remove_session(self, session_id: str) -> None:
         """
@@ -137,51 +200,78 @@ class SseTransportHandler(TransportShutdownHandler):
             session_id: Session identifier to remove
 
         """
-        if session_id in self.active_sessions:
-            del self.active_sessions[session_id]
+        self.active_sessions.pop(session_id, None)
 
     async def handle_shutdown(self) -> None:
         """
         Handle SSE transport shutdown.
 
         This manages the graceful closing of SSE connections and proper
-        notification to clients.
+        notification to clients. The whole SSE shutdown, callbacks included,
+        is bounded by a single deadline fixed on entry.
         """
-        # Call parent method to run registered callbacks
-        await super().handle_shutdown()
-
-        # Close all active sessions
-        close_tasks = []
-        for session_id, session in self.active_sessions.items():
-            try:
-                # Send a close notification if possible
-                if hasattr(session, "send_close_notification") and callable(
-                    session.send_close_notification
-                ):
-                    try:
-                        notify_task = session.send_close_notification()
-                        if asyncio.iscoroutine(notify_task):
-                            close_tasks.append(asyncio.create_task(notify_task))
-                    except Exception as e:
-                        logger.debug(f"Expected error sending close notification: {e}")
-
-                # Close the session
-                if hasattr(session, "close") and callable(session.close):
-                    close_method = session.close()
-                    if asyncio.iscoroutine(close_method):
-                        close_tasks.append(asyncio.create_task(close_method))
+        deadline = asyncio.get_running_loop().time() + _SESSION_CLOSE_TIMEOUT
+
+        # Call parent method to run registered callbacks, if there are any
+        if self._shutdown_callbacks:
+            with contextlib.suppress(TimeoutError):
+                async with asyncio.timeout_at(deadline):
+                    await super().handle_shutdown()
+
+        # Take ownership of the tracked sessions. remove_session() calls made
+        # while they close then hit the fresh dict instead of mutating the one
+        # being iterated, so no copy of the items is needed.
+        sessions, self.active_sessions = self.active_sessions, {}
+        if not sessions:
+            return
+
+        # Close all active sessions. A fixed pool of workers drains them, so
+        # task count and in-flight closes stay bounded however many are open.
+        pending = iter(sessions.items())
+
+        async def close_worker() -> None:
+            for session_id, (send_close_notification, close) in pending:
+                await self._close_session(session_id, send_close_notification, close)
+
+        workers = min(_MAX_CONCURRENT_SESSION_CLOSES, len(sessions))
+        try:
+            async with asyncio.timeout_at(deadline), asyncio.TaskGroup() as tg:
+                for _ in range(workers):
+                    tg.create_task(close_worker())
+        except TimeoutError:
+            pass  # Suppress timeout error
+
+    @staticmethod
+    async def _close_session(
+        session_id: str, send_close_notification: Callable | None, close: Callable | None
+    ) -> None:
+        """
+        Notify an SSE session of the shutdown, then close it.
 
-            except Exception as e:
-                logger.error(f"Error closing SSE session {session_id}: {e}")
+        Args:
+            session_id: Session identifier, for error messages
+            send_close_notification: The session's notification method, if any
+            close: The session's close method, if any
 
-        # Wait for all close operations with a timeout
-        if close_tasks:
-            try:
-                await asyncio.wait(close_tasks, timeout=3.0)
-            except TimeoutError:
-                pass  # Suppress timeout error
-            except Exception as e:
-                logger.error(f"Error waiting for SSE sessions to close: {e}")
+        """
+        try:
+            # Send a close notification if possible
+            if send_close_notification is not None:
+                try:
+                    notify_result = send_close_notification()
+                    if asyncio.iscoroutine(notify_result):
+                        await notify_result
+                except Exception as e:
+                    logger.debug("Expected error sending close notification: %s", e)
+
+            # Close the session
+            if close is not None:
+                close_result = close()
+                if asyncio.iscoroutine(close_result):
+                    await close_result
+
+        except Exception as e:
+            logger.error("Error closing SSE session %s: %s", session_id, e)
 
 
 # Create default transport handlers